@@ -2,14 +2,50 @@ import os
 import streamlit as st
 from datetime import datetime, timedelta
 from dotenv import load_dotenv
-from langchain_planner import LangChainTravelPlanner
+from langchain_planner import LangChainTravelPlanner, MAX_HISTORY_TURNS
 import asyncio
+import atexit
+import contextlib
+import time
+import traceback
+import weakref
 
-# Load environment variables
-load_dotenv()
+# Streamlit reruns this script on every interaction, so one-time setup is cached
+@st.cache_resource(show_spinner=False)
+def load_environment():
+    """Load environment variables from the .env file."""
+    load_dotenv()
 
-# Initialize the LangChain Travel Planner
-planner = LangChainTravelPlanner()
+@st.cache_resource(show_spinner=False)
+def get_planner_registry():
+    """Track each session's planner and event loop so their HTTP clients are closed at exit."""
+    registry = weakref.WeakKeyDictionary()
+    atexit.register(close_planners, registry)
+    return registry
+
+def close_planners(registry):
+    """Close every tracked planner on the loop its HTTP client was used on."""
+    for planner, loop in list(registry.items()):
+        if not loop.is_closed() and not loop.is_running():
+            loop.run_until_complete(planner.aclose())
+
+def get_planner():
+    """Return this session's LangChain Travel Planner, built once and reused across reruns.
+    
+    Each session runs on its own event loop (see get_event_loop) and the planner's HTTP
+    client can only be used from one loop, so planners are kept per session.
+    """
+    if "_planner" not in st.session_state:
+        planner = LangChainTravelPlanner()
+        get_planner_registry()[planner] = get_event_loop()
+        st.session_state["_planner"] = planner
+    return st.session_state["_planner"]
+
+load_environment()
+
+# Streamed chunks are flushed to the UI every STREAM_FLUSH_MS or STREAM_FLUSH_CHUNKS chunks
+STREAM_FLUSH_SECONDS = int(os.getenv("STREAM_FLUSH_MS", "50")) / 1000
+STREAM_FLUSH_CHUNKS = int(os.getenv("STREAM_FLUSH_CHUNKS", "16"))
 
 def format_trip_request(destination, start_date, end_date, interests, budget, num_travelers):
     """Format the trip request into a natural language prompt."""
@@ -41,6 +77,8 @@ async def main():
         st.error("❌ OpenAI API key is required. Please check your .env file and restart the application.")
         st.stop()
     
+    planner = get_planner()
+    
     # Initialize session state for chat history if it doesn't exist
     if "messages" not in st.session_state:
         st.session_state.messages = [
@@ -69,22 +107,39 @@ async def main():
             # Get assistant response
             try:
                 # Prepare the input for the agent
+                # Messages already have the role/content shape the planner expects, so
+                # just slice the most recent turns, excluding the current message
                 agent_input = {
                     "input": prompt,
-                    "chat_history": [
-                        {"role": msg["role"], "content": msg["content"]}
-                        for msg in st.session_state.messages[:-1]  # Exclude the current message
-                        if msg["role"] in ["user", "assistant"]
-                    ]
+                    "chat_history": st.session_state.messages[-2 * MAX_HISTORY_TURNS - 1:-1]
                 }
                 
-                response = await planner.plan_trip(agent_input)
-                if response["success"]:
-                    full_response = response["data"]
-                else:
-                    full_response = f"I encountered an error: {response['error']}"
+                # Stream the response so output appears as soon as the first tokens arrive,
+                # batching updates so the placeholder isn't re-rendered for every token.
+                # Each update is the full response text so far.
+                pending_updates = 0
+                last_flush = time.monotonic()
+                rendered_length = 0
+                # aclosing makes sure the stream is shut down if a rerun or Stop interrupts it
+                async with contextlib.aclosing(planner.plan_trip_stream(agent_input)) as stream:
+                    async for full_response in stream:
+                        pending_updates += 1
+                        # Shorter text means the planner discarded what was shown (e.g. text
+                        # before a tool call), so render that right away instead of batching
+                        if (len(full_response) < rendered_length
+                                or pending_updates >= STREAM_FLUSH_CHUNKS
+                                or time.monotonic() - last_flush > STREAM_FLUSH_SECONDS):
+                            pending_updates = 0
+                            last_flush = time.monotonic()
+                            rendered_length = len(full_response)
+                            message_placeholder.markdown(full_response + "▌")
+                if not full_response:
+                    full_response = "I encountered an error: No valid response from the agent."
             except Exception as e:
+                # The planner has already logged the traceback; only show it when debugging
                 full_response = f"An error occurred: {str(e)}"
+                if os.getenv("DEBUG"):
+                    full_response += f"\n\n```\n{traceback.format_exc()}\n```"
             
             # Display the response
             message_placeholder.markdown(full_response)
@@ -92,7 +147,27 @@ async def main():
         # Add assistant response to chat history
         st.session_state.messages.append({"role": "assistant", "content": full_response})
 
+def get_event_loop():
+    """Return this session's event loop, reused across reruns so HTTP connection pools stay warm."""
+    if "_loop" not in st.session_state:
+        st.session_state["_loop"] = asyncio.new_event_loop()
+    return st.session_state["_loop"]
+
+def cancel_pending_tasks(loop):
+    """Cancel and wait for any tasks a finished or interrupted run left on the loop."""
+    pending = asyncio.all_tasks(loop)
+    for task in pending:
+        task.cancel()
+    if pending:
+        loop.run_until_complete(asyncio.gather(*pending, return_exceptions=True))
+
 # Run the app
 if __name__ == "__main__":
-    import asyncio
-    asyncio.run(main())
+    loop = get_event_loop()
+    asyncio.set_event_loop(loop)
+    try:
+        loop.run_until_complete(main())
+    finally:
+        # A rerun or Stop can interrupt main() mid-response; don't let its work resume on
+        # the next rerun. The loop itself is deliberately left open.
+        cancel_pending_tasks(loop)
@@ -1,19 +1,64 @@
-from typing import List, Dict, Any, Optional, Union
+from typing import List, Dict, Any, AsyncIterator, Optional, Union
 from datetime import datetime, date, timedelta
 from pydantic import BaseModel, Field
 from typing import Tuple
 import re
+import asyncio
+import functools
+from collections import OrderedDict
+import contextvars
+import threading
+import aiohttp
+import httpx
+import orjson
 from langchain.agents import AgentExecutor, create_openai_tools_agent
 from langchain.agents.agent_types import AgentType
 from langchain.memory import ConversationBufferMemory
-from langchain_openai import ChatOpenAI
+from langchain_openai import ChatOpenAI, OpenAIEmbeddings
 from langchain_core.messages import HumanMessage, AIMessage, SystemMessage
 from langchain_core.tools import tool
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
-import requests
 import os
+import logging
+from response_cache import ResponseCache
+
+logger = logging.getLogger(__name__)
 
 # Date parsing utilities
+# Common shapes are parsed directly with strptime; dateutil is only a fallback
+_FAST_FORMATS = ("%B %d %Y", "%b %d %Y", "%m/%d %Y")  # December 23, Dec 23, 12/23
+# Try the most recently successful format first, since users tend to repeat one shape
+_FAST_FORMAT_ORDERS = [
+    (first,) + tuple(i for i in range(len(_FAST_FORMATS)) if i != first)
+    for first in range(len(_FAST_FORMATS))
+]
+_last_fast_format = 0
+_ORDINAL_SUFFIX_RE = re.compile(r'(?<=\d)(?:st|nd|rd|th)\b', re.IGNORECASE)
+
+# Date ranges in free-form user input (e.g. 'December 20 to January 3', '12/20-1/3'),
+# combined into one alternation so the input is scanned in a single pass
+_MONTH_NAME_RANGE = r'(?:from\s+|between\s+)?(?:the\s+)?(Jan(?:uary)?|Feb(?:ruary)?|Mar(?:ch)?|Apr(?:il)?|May|Jun(?:e)?|Jul(?:y)?|Aug(?:ust)?|Sep(?:tember)?|Oct(?:ober)?|Nov(?:ember)?|Dec(?:ember)?)\s+(\d{1,2})(?:st|nd|rd|th)?(?:\s*,\s*\d{4})?(?:\s+to|\s*-\s*)(?:the\s+)?(Jan(?:uary)?|Feb(?:ruary)?|Mar(?:ch)?|Apr(?:il)?|May|Jun(?:e)?|Jul(?:y)?|Aug(?:ust)?|Sep(?:tember)?|Oct(?:ober)?|Nov(?:ember)?|Dec(?:ember)?)\s+(\d{1,2})(?:st|nd|rd|th)?(?:\s*,\s*\d{4})?'
+_NUMERIC_RANGE = r'(\d{1,2})[/-](\d{1,2})(?:[/-]\d{2,4})?(?:\s*to|-|through\s*)(\d{1,2})[/-](\d{1,2})(?:[/-]\d{2,4})?'
+# RE2 matches in linear time, so prefer it over the backtracking `re` engine when installed
+try:
+    import re2 as _range_re_engine
+except ImportError:
+    _range_re_engine = re
+_DATE_RANGE_RE = _range_re_engine.compile("(?i)(?:" + _MONTH_NAME_RANGE + ")|(?:" + _NUMERIC_RANGE + ")")
+
+def _strptime_with_year(date_str: str, year: int) -> Optional[date]:
+    """Parse a year-less date string with the first matching fast format, or return None."""
+    global _last_fast_format
+    value = f"{date_str} {year}"
+    for index in _FAST_FORMAT_ORDERS[_last_fast_format]:
+        try:
+            parsed_date = datetime.strptime(value, _FAST_FORMATS[index]).date()
+        except ValueError:
+            continue
+        _last_fast_format = index
+        return parsed_date
+    return None
+
 def parse_date_with_reference(date_str: str, reference_date: date = None) -> date:
     """Parse a date string that might be missing year information.
     
@@ -26,28 +71,24 @@ def parse_date_with_reference(date_str: str, reference_date: date = None) -> dat
     """
     if reference_date is None:
         reference_date = date.today()
-        
-    # Try different date formats
-    formats = [
-        (r'(?P<month>\w+)\s+(?P<day>\d{1,2})(?:st|nd|rd|th)?', '%B %d'),  # December 23
-        (r'(?P<month>\w+)\s+(?P<day>\d{1,2})', '%B %d'),                    # December 23rd
-        (r'(?P<month>\d{1,2})/(?P<day>\d{1,2})', '%m/%d'),                   # 12/23
-    ]
+    return date.fromordinal(_parse_date_cached(date_str.strip().lower(), reference_date.toordinal()))
+
+@functools.lru_cache(maxsize=4096)
+def _parse_date_cached(date_str: str, reference_ordinal: int) -> int:
+    """Parse a normalized date string relative to a reference date, both as ordinals."""
+    reference_date = date.fromordinal(reference_ordinal)
     
-    for pattern, date_format in formats:
-        match = re.match(pattern, date_str, re.IGNORECASE)
-        if match:
-            try:
-                # Parse the date with the current year
-                parsed_date = datetime.strptime(f"{match.group('month')} {match.group('day')} {reference_date.year}", 
-                                             f"%B %d %Y").date()
-                
-                # If the date is in the past, assume it's for next year
-                if parsed_date < reference_date and (reference_date.month, reference_date.day) != (12, 31):
-                    parsed_date = parsed_date.replace(year=reference_date.year + 1)
-                return parsed_date
-            except (ValueError, AttributeError):
-                continue
+    # Try the strptime fast paths with the reference year
+    parsed_date = _strptime_with_year(_ORDINAL_SUFFIX_RE.sub('', date_str), reference_date.year)
+    if parsed_date is not None:
+        try:
+            # If the date is in the past, assume it's for next year
+            if parsed_date < reference_date and (reference_date.month, reference_date.day) != (12, 31):
+                parsed_date = parsed_date.replace(year=reference_date.year + 1)
+            return parsed_date.toordinal()
+        except ValueError:
+            # e.g. February 29 rolled into a non-leap year; let dateutil have a go
+            pass
     
     # If no format matched, try to parse with dateutil (more lenient)
     try:
@@ -55,45 +96,108 @@ def parse_date_with_reference(date_str: str, reference_date: date = None) -> dat
         parsed_date = parser.parse(date_str, default=reference_date).date()
         if parsed_date < reference_date and (reference_date.month, reference_date.day) != (12, 31):
             parsed_date = parsed_date.replace(year=reference_date.year + 1)
-        return parsed_date
+        return parsed_date.toordinal()
     except (ImportError, ValueError):
         pass
     
     # If all else fails, return the reference date
-    return reference_date
+    return reference_ordinal
 
 # Pydantic models for type safety
 class WeatherInput(BaseModel):
     location: str = Field(..., description="City and country (e.g., 'Paris,France')")
     start_date: str = Field(..., description="Start date in YYYY-MM-DD format")
     end_date: str = Field(..., description="End date in YYYY-MM-DD format")
-    
-    class Config:
-        arbitrary_types_allowed = True
 
 class EventInput(BaseModel):
     location: str = Field(..., description="City and country (e.g., 'Paris,France')")
     date: str = Field(..., description="Date in YYYY-MM-DD format")
     category: Optional[str] = Field(None, description="Event category (e.g., 'music', 'sports')")
-    
-    class Config:
-        arbitrary_types_allowed = True
 
 class ItineraryDay(BaseModel):
     date: str = Field(..., description="Date in YYYY-MM-DD format")
     activities: List[str] = Field(..., description="List of activities for the day")
-    
-    class Config:
-        arbitrary_types_allowed = True
 
 class Itinerary(BaseModel):
     destination: str = Field(..., description="Travel destination")
     start_date: str = Field(..., description="Start date in YYYY-MM-DD format")
     end_date: str = Field(..., description="End date in YYYY-MM-DD format")
     days: List[ItineraryDay] = Field(..., description="Daily itinerary")
+
+# Each planner owns the aiohttp session its tools use, so connections (and TLS handshakes)
+# are reused across tool calls and the session lives exactly as long as its planner. The
+# planner binds it here while the agent runs, since the tools are plain module functions.
+_HTTP_TIMEOUT = aiohttp.ClientTimeout(total=10)
+_http_session: "contextvars.ContextVar[Optional[aiohttp.ClientSession]]" = contextvars.ContextVar(
+    "_http_session", default=None
+)
+
+def get_session() -> aiohttp.ClientSession:
+    """Return the aiohttp session bound by the planner running the current request."""
+    session = _http_session.get()
+    if session is None:
+        raise RuntimeError("No HTTP session bound; run the tools through LangChainTravelPlanner")
+    return session
+
+# Geocoding results are stable, so keep them in a bounded in-process LRU. Concurrent
+# lookups for the same location share a single in-flight request. Streamlit sessions run
+# on separate threads, so both dicts are only touched under _geocode_lock.
+_GEOCODE_URL = "https://geocoding-api.open-meteo.com/v1/search"
+_GEOCODE_CACHE_SIZE = 1024
+_geocode_cache: "OrderedDict[str, Optional[Tuple[float, float]]]" = OrderedDict()
+_geocode_inflight: Dict[Tuple[asyncio.AbstractEventLoop, str], "asyncio.Task[Optional[Tuple[float, float]]]"] = {}
+_geocode_lock = threading.Lock()
+
+async def _fetch_coordinates(location: str) -> Optional[Tuple[float, float]]:
+    geo_params = {
+        "name": location,
+        "count": 1,
+        "format": "json"
+    }
     
-    class Config:
-        arbitrary_types_allowed = True
+    session = get_session()
+    async with session.get(_GEOCODE_URL, params=geo_params, timeout=_HTTP_TIMEOUT) as geo_response:
+        geo_response.raise_for_status()
+        geo_data = orjson.loads(await geo_response.read())
+    
+    if not geo_data.get('results'):
+        return None
+    
+    location_data = geo_data['results'][0]
+    return location_data['latitude'], location_data['longitude']
+
+async def geocode(location: str) -> Optional[Tuple[float, float]]:
+    """Resolve a location to (latitude, longitude), or None if it's unknown.
+    
+    Args:
+        location: City and country (e.g., 'Paris,France')
+    """
+    key = location.strip().lower()
+    # Tasks can only be awaited on their own loop, so in-flight requests are shared per loop
+    inflight_key = (asyncio.get_running_loop(), key)
+    with _geocode_lock:
+        if key in _geocode_cache:
+            _geocode_cache.move_to_end(key)
+            return _geocode_cache[key]
+        
+        task = _geocode_inflight.get(inflight_key)
+        if task is None:
+            task = asyncio.ensure_future(_fetch_coordinates(location))
+            _geocode_inflight[inflight_key] = task
+            # Only successful lookups are cached; errors are retried on the next call
+            task.add_done_callback(lambda t: _store_geocode(inflight_key, t))
+    return await asyncio.shield(task)
+
+def _store_geocode(inflight_key: Tuple[asyncio.AbstractEventLoop, str], task: "asyncio.Task[Optional[Tuple[float, float]]]") -> None:
+    with _geocode_lock:
+        _geocode_inflight.pop(inflight_key, None)
+        if task.cancelled() or task.exception() is not None:
+            return
+        key = inflight_key[1]
+        _geocode_cache[key] = task.result()
+        _geocode_cache.move_to_end(key)
+        if len(_geocode_cache) > _GEOCODE_CACHE_SIZE:
+            _geocode_cache.popitem(last=False)
 
 # Weather Tool
 @tool(args_schema=WeatherInput)
@@ -110,23 +214,10 @@ async def get_weather_forecast(location: str, start_date: str, end_date: str) ->
         base_url = "https://api.open-meteo.com/v1/forecast"
         
         # First get coordinates
-        geo_url = "https://geocoding-api.open-meteo.com/v1/search"
-        geo_params = {
-            "name": location,
-            "count": 1,
-            "format": "json"
-        }
-        
-        geo_response = requests.get(geo_url, params=geo_params, timeout=10)
-        geo_response.raise_for_status()
-        geo_data = geo_response.json()
-        
-        if not geo_data.get('results'):
+        coordinates = await geocode(location)
+        if coordinates is None:
             return f"Location '{location}' not found"
-        
-        location_data = geo_data['results'][0]
-        lat = location_data['latitude']
-        lon = location_data['longitude']
+        lat, lon = coordinates
         
         # Get weather data
         weather_params = {
@@ -134,29 +225,51 @@ async def get_weather_forecast(location: str, start_date: str, end_date: str) ->
             "longitude": lon,
             "start_date": start_date,
             "end_date": end_date,
-            "daily": ["weathercode", "temperature_2m_max", "temperature_2m_min", "precipitation_sum"],
+            "daily": "weathercode,temperature_2m_max,temperature_2m_min,precipitation_sum",
             "timezone": "auto"
         }
         
-        response = requests.get(base_url, params=weather_params, timeout=10)
-        response.raise_for_status()
-        weather_data = response.json()
+        session = get_session()
+        async with session.get(base_url, params=weather_params, timeout=_HTTP_TIMEOUT) as response:
+            response.raise_for_status()
+            weather_data = orjson.loads(await response.read())
         
         # Format the response
-        days = []
-        for i, date_str in enumerate(weather_data['daily']['time']):
-            days.append(
-                f"{date_str}: "
-                f"High: {weather_data['daily']['temperature_2m_max'][i]}°C, "
-                f"Low: {weather_data['daily']['temperature_2m_min'][i]}°C, "
-                f"Precipitation: {weather_data['daily']['precipitation_sum'][i]}mm"
-            )
+        daily = weather_data['daily']
+        days = zip(
+            daily['time'],
+            daily['temperature_2m_max'],
+            daily['temperature_2m_min'],
+            daily['precipitation_sum']
+        )
         
-        return f"Weather forecast for {location}:\n" + "\n".join(days)
+        return f"Weather forecast for {location}:\n" + "\n".join(
+            f"{date_str}: High: {high}°C, Low: {low}°C, Precipitation: {precipitation}mm"
+            for date_str, high, low, precipitation in days
+        )
     
     except Exception as e:
         return f"Error getting weather data: {str(e)}"
 
+# Placeholder responses for the stub tools, filled in per call
+_EVENTS_TMPL = """Events in {location} on {date}:
+- Local festival
+- Museum exhibition
+- Guided city tour
+- {extra}"""
+
+_ITINERARY_TMPL = """
+    Suggested itinerary for {destination} from {start_date} to {end_date}:
+    - Day 1: Arrival and city orientation
+    - Day 2: Visit main attractions
+    - Day 3: Day trip to nearby locations
+    - Day 4: Local experiences
+    - Day 5: Departure
+    
+    Interests: {interests}
+    Budget: {budget}
+    """
+
 # Event Tool (simplified version)
 @tool(args_schema=EventInput)
 async def find_events(location: str, date: str, category: str = None) -> str:
@@ -168,11 +281,11 @@ async def find_events(location: str, date: str, category: str = None) -> str:
         category: Optional event category (e.g., 'music', 'sports')
     """
     # This is a simplified version - in a real app, you'd query an events API
-    return f"""Events in {location} on {date}:
-- Local festival
-- Museum exhibition
-- Guided city tour
-- {category.capitalize() + ' event' if category else 'Local market'}"""
+    return _EVENTS_TMPL.format(
+        location=location,
+        date=date,
+        extra=category.capitalize() + ' event' if category else 'Local market'
+    )
 
 # Itinerary Planning Tool
 @tool
@@ -185,25 +298,45 @@ async def create_itinerary(
 ) -> str:
     """Create a travel itinerary based on destination, dates, interests, and budget."""
     # In a real implementation, this would use the LLM to generate an itinerary
-    return f"""
-    Suggested itinerary for {destination} from {start_date} to {end_date}:
-    - Day 1: Arrival and city orientation
-    - Day 2: Visit main attractions
-    - Day 3: Day trip to nearby locations
-    - Day 4: Local experiences
-    - Day 5: Departure
-    
-    Interests: {', '.join(interests)}
-    Budget: {budget}
-    """
+    return _ITINERARY_TMPL.format(
+        destination=destination,
+        start_date=start_date,
+        end_date=end_date,
+        interests=', '.join(interests),
+        budget=budget
+    )
+
+def _current_date() -> str:
+    """Today's date as shown to the model in the system prompt."""
+    return date.today().strftime("%B %d, %Y")
+
+# Number of user/assistant turns from the chat history included in each prompt
+MAX_HISTORY_TURNS = 20
 
 class LangChainTravelPlanner:
     def __init__(self):
+        # Shared HTTP client so every OpenAI call reuses keep-alive (and HTTP/2) connections.
+        # Its connections are bound to the event loop they were opened on, so a planner
+        # must only be used from one loop (the Streamlit app keeps one per session).
+        self._http = httpx.AsyncClient(
+            http2=True,
+            timeout=30,
+            limits=httpx.Limits(max_keepalive_connections=20, max_connections=50)
+        )
+        
+        # aiohttp session for the tools, created on first use (see _bind_session)
+        self._session: Optional[aiohttp.ClientSession] = None
+        
         # Initialize the language model
         self.llm = ChatOpenAI(
             model="gpt-4-turbo-preview",
             temperature=0.7,
-            openai_api_key=os.getenv("OPENAI_API_KEY")
+            streaming=True,
+            openai_api_key=os.getenv("OPENAI_API_KEY"),
+            http_async_client=self._http,
+            # Let the model request several independent tools in one step; the executor's
+            # async path runs the resulting tool calls concurrently
+            model_kwargs={"parallel_tool_calls": True}
         )
         
         # Set up tools
@@ -213,9 +346,9 @@ class LangChainTravelPlanner:
             create_itinerary
         ]
         
-        # Define the system message
-        current_date = date.today().strftime("%B %d, %Y")
-        system_message = f"""You are a helpful travel assistant that helps users plan their trips. 
+        # Define the system message; {current_date} is filled in each time the prompt is
+        # formatted, since one planner can outlive the day it was built on
+        system_message = """You are a helpful travel assistant that helps users plan their trips. 
         You can provide weather forecasts, find events, and create detailed itineraries.
         Be friendly, informative, and provide useful recommendations.
         
@@ -232,7 +365,7 @@ class LangChainTravelPlanner:
             MessagesPlaceholder(variable_name="chat_history", optional=True),
             ("human", "{input}"),
             MessagesPlaceholder(variable_name="agent_scratchpad")
-        ])
+        ]).partial(current_date=_current_date)
         
         # Create the agent
         agent = create_openai_tools_agent(self.llm, self.tools, self.prompt)
@@ -245,55 +378,116 @@ class LangChainTravelPlanner:
             handle_parsing_errors=True
         )
         
-        # Initialize chat history
-        self.chat_history = []
+        # Cache responses so repeated questions skip the LLM round-trip. The semantic tier
+        # (near-identical questions) is opt-in via SEMANTIC_CACHE, since it adds an
+        # embeddings call before every uncached turn.
+        embeddings = None
+        if os.getenv("SEMANTIC_CACHE"):
+            embeddings = OpenAIEmbeddings(
+                openai_api_key=os.getenv("OPENAI_API_KEY"),
+                http_async_client=self._http
+            )
+        self.response_cache = ResponseCache(
+            ttl=float(os.getenv("RESPONSE_CACHE_TTL", "3600")),
+            embeddings=embeddings,
+            similarity_threshold=float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.95"))
+        )
+    
+    async def aclose(self) -> None:
+        """Close the shared OpenAI HTTP client and the tools' aiohttp session."""
+        await self._http.aclose()
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
     
-    async def plan_trip(self, request_data: Dict[str, Any]) -> Dict[str, Any]:
+    def _bind_session(self) -> contextvars.Token:
+        """Make this planner's aiohttp session available to the tools, creating it on first use.
+        
+        Must be called with the event loop running; the session is bound to that loop.
+        """
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=50, ttl_dns_cache=300)
+            )
+        return _http_session.set(self._session)
+    
+    async def _get_cached(self, user_input: str, last_turn: str) -> Optional[str]:
+        """Look up a cached response, treating cache errors as a miss."""
+        try:
+            return await self.response_cache.aget(user_input, last_turn)
+        except Exception:
+            logger.warning("Response cache lookup failed", exc_info=True)
+            return None
+    
+    async def _store_cached(self, user_input: str, output: str, last_turn: str, no_cache: bool) -> None:
+        """Cache the AI's response unless caching is disabled."""
+        if no_cache:
+            return
+        try:
+            await self.response_cache.aset(user_input, output, last_turn)
+        except Exception:
+            logger.warning("Response cache store failed", exc_info=True)
+    
+    def _build_messages(self, request_data: Dict[str, Any]) -> List[Any]:
+        """Build the chat history from the request and format the agent prompt."""
+        user_input = request_data.get("input", "")
+        
+        # Pre-process the input to handle dates
+        current_date = date.today()
+        # If we find a date range, we'll let the LLM handle it with the context
+        # from the system message about current date
+        match = _DATE_RANGE_RE.search(user_input)
+        
+        # The request's chat history is the full log, so rebuild rather than extend,
+        # keeping only the most recent turns to bound the prompt size
+        chat_history = [
+            HumanMessage(content=msg["content"]) if msg["role"] == "user" 
+            else AIMessage(content=msg["content"])
+            for msg in request_data.get("chat_history", [])[-2 * MAX_HISTORY_TURNS:]
+        ]
+        
+        # Format the prompt with the current chat history
+        return self.prompt.format_messages(
+            input=user_input,
+            chat_history=chat_history,
+            agent_scratchpad=[]
+        )
+    
+    async def plan_trip(self, request_data: Dict[str, Any], no_cache: bool = False) -> Dict[str, Any]:
         """Main method to handle trip planning requests.
         
         Args:
             request_data: Dictionary containing 'input' and 'chat_history' keys
+            no_cache: Skip the response cache, e.g. for sensitive prompts
             
         Returns:
             Dictionary with 'success' status and 'data' or 'error' message
         """
         try:
             user_input = request_data.get("input", "")
+            history = request_data.get("chat_history", [])
+            last_turn = history[-1]["content"] if history else ""
             
-            # Pre-process the input to handle dates
-            current_date = date.today()
-            date_patterns = [
-                r'(?:from\s+|between\s+)?(?:the\s+)?(Jan(?:uary)?|Feb(?:ruary)?|Mar(?:ch)?|Apr(?:il)?|May|Jun(?:e)?|Jul(?:y)?|Aug(?:ust)?|Sep(?:tember)?|Oct(?:ober)?|Nov(?:ember)?|Dec(?:ember)?)\s+(\d{1,2})(?:st|nd|rd|th)?(?:\s*,\s*\d{4})?(?:\s+to|\s*-\s*)(?:the\s+)?(Jan(?:uary)?|Feb(?:ruary)?|Mar(?:ch)?|Apr(?:il)?|May|Jun(?:e)?|Jul(?:y)?|Aug(?:ust)?|Sep(?:tember)?|Oct(?:ober)?|Nov(?:ember)?|Dec(?:ember)?)\s+(\d{1,2})(?:st|nd|rd|th)?(?:\s*,\s*\d{4})?',
-                r'(\d{1,2})[/-](\d{1,2})(?:[/-]\d{{2,4}})?(?:\s*to|-|through\s*)(\d{1,2})[/-](\d{1,2})(?:[/-]\d{{2,4}})?',
-            ]
+            if not no_cache:
+                cached = await self._get_cached(user_input, last_turn)
+                if cached is not None:
+                    return {
+                        "success": True,
+                        "data": cached
+                    }
             
-            for pattern in date_patterns:
-                match = re.search(pattern, user_input, re.IGNORECASE)
-                if match:
-                    # If we find a date range, we'll let the LLM handle it with the context
-                    # from the system message about current date
-                    break
-            
-            # Update chat history
-            self.chat_history.extend([
-                HumanMessage(content=msg["content"]) if msg["role"] == "user" 
-                else AIMessage(content=msg["content"])
-                for msg in request_data.get("chat_history", [])
-            ])
-            
-            # Format the prompt with the current chat history
-            messages = self.prompt.format_messages(
-                input=user_input,
-                chat_history=self.chat_history,
-                agent_scratchpad=[]
-            )
+            messages = self._build_messages(request_data)
             
             # Invoke the agent
-            response = await self.agent_executor.ainvoke({"input": messages})
+            session_token = self._bind_session()
+            try:
+                response = await self.agent_executor.ainvoke({"input": messages})
+            finally:
+                # Shut the agent run down too if our caller stops consuming early
+                await events.aclose()
+                _http_session.reset(session_token)
             
-            # Add the AI's response to chat history
             if response and "output" in response:
-                self.chat_history.append(AIMessage(content=response["output"]))
+                await self._store_cached(user_input, response["output"], last_turn, no_cache)
                 return {
                     "success": True,
                     "data": response["output"]
@@ -305,12 +499,78 @@ class LangChainTravelPlanner:
                 }
             
         except Exception as e:
-            import traceback
-            error_trace = traceback.format_exc()
+            logger.exception("plan_trip failed")
+            error = str(e)
+            if os.getenv("DEBUG"):
+                import traceback
+                error = f"Error in plan_trip: {error}\n\n{traceback.format_exc()}"
             return {
                 "success": False,
-                "error": f"Error in plan_trip: {str(e)}\n\n{error_trace}"
+                "error": error
             }
+    
+    async def plan_trip_stream(self, request_data: Dict[str, Any], no_cache: bool = False) -> AsyncIterator[str]:
+        """Stream the agent's response to a trip planning request.
+            
+        Each item is the text of the response so far, so callers should display the
+        latest item rather than concatenating them. Only the agent's final answer is
+        streamed: text the model emits in a step that ends up calling tools is dropped
+        (an empty string is yielded to clear it). Cached responses are yielded whole.
+        Errors are logged and re-raised to the caller.
+            
+        Args:
+            request_data: Dictionary containing 'input' and 'chat_history' keys
+            no_cache: Skip the response cache, e.g. for sensitive prompts
+        """
+        try:
+            user_input = request_data.get("input", "")
+            history = request_data.get("chat_history", [])
+            last_turn = history[-1]["content"] if history else ""
+            
+            if not no_cache:
+                cached = await self._get_cached(user_input, last_turn)
+                if cached is not None:
+                    yield cached
+                    return
+            
+            messages = self._build_messages(request_data)
+            
+            final_text = ""
+            step_text = ""
+            calls_tools = False
+            session_token = self._bind_session()
+            events = self.agent_executor.astream_events({"input": messages}, version="v2")
+            try:
+                async for event in events:
+                    kind = event["event"]
+                    if kind == "on_chat_model_start":
+                        # Each agent step is a new model call
+                        step_text = ""
+                        calls_tools = False
+                    elif kind == "on_chat_model_stream":
+                        chunk = event["data"]["chunk"]
+                        if chunk.tool_call_chunks and not calls_tools:
+                            # This step is a tool call, so any text so far isn't the answer
+                            calls_tools = True
+                            if step_text:
+                                step_text = ""
+                                yield step_text
+                        if chunk.content and not calls_tools:
+                            step_text += chunk.content
+                            yield step_text
+                    elif kind == "on_chat_model_end" and not calls_tools:
+                        final_text = step_text
+            finally:
+                # Shut the agent run down too if our caller stops consuming early
+                await events.aclose()
+                _http_session.reset(session_token)
+            
+            if final_text:
+                await self._store_cached(user_input, final_text, last_turn, no_cache)
+        except Exception:
+            # Callers only see the exception message, so keep the full traceback in the logs
+            logger.exception("plan_trip_stream failed")
+            raise
 
 # Example usage
 async def main():
@@ -338,6 +598,8 @@ async def main():
             break
         except Exception as e:
             print(f"\nAn unexpected error occurred: {str(e)}")
+    
+    await planner.aclose()
 
 if __name__ == "__main__":
     import asyncio
@@ -0,0 +1,131 @@
+from typing import Dict, List, Optional, Tuple
+from collections import OrderedDict
+import hashlib
+import re
+import time
+import numpy as np
+
+_TERM_RE = re.compile(r"[a-z0-9]+(?:[.,:/'-][a-z0-9]+)*")
+# Filler words that can differ between two phrasings of the same question. Negations
+# are deliberately absent, since 'with' and 'without' must never share an answer.
+_STOPWORDS = frozenset(
+    "a an the in on at for to of and or is are be me my i you we our please can could "
+    "would will like about what whats what's how do does it this that there give tell show".split()
+)
+
+
+def content_terms(text: str) -> frozenset:
+    """Lowercased words and numbers in text, ignoring filler words and word order."""
+    return frozenset(term for term in _TERM_RE.findall(text.lower()) if term not in _STOPWORDS)
+
+
+class ResponseCache:
+    """Two-tier cache for agent responses.
+
+    The exact tier is keyed by a hash of the normalized user input and the last
+    conversation turn. The optional semantic tier embeds the input and returns a
+    stored response when a previous input after the same turn is close enough and
+    uses exactly the same content words and numbers (see content_terms). It only
+    catches rephrasings such as reordered or filler words, so requests that differ
+    by destination, dates or budget never share an answer.
+    """
+
+    def __init__(
+        self,
+        ttl: float = 3600,
+        maxsize: int = 1024,
+        embeddings=None,
+        similarity_threshold: float = 0.95,
+    ):
+        """
+        Args:
+            ttl: Seconds a cached response stays valid
+            maxsize: Maximum number of entries kept in each tier
+            embeddings: Optional LangChain embeddings model enabling the semantic tier
+            similarity_threshold: Minimum cosine similarity for a semantic hit
+        """
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.embeddings = embeddings
+        self.similarity_threshold = similarity_threshold
+
+        # key -> (expires_at, response)
+        self._exact: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        # (expires_at, context key, unit embedding, response)
+        self._semantic: List[Tuple[float, str, np.ndarray, str]] = []
+        # Embeddings computed during a missed lookup, reused when the response is stored
+        self._pending: Dict[str, np.ndarray] = {}
+
+    @staticmethod
+    def make_key(user_input: str, last_turn: str = "") -> str:
+        """Build the exact-match key for a user input and its preceding turn."""
+        normalized = user_input.lower().strip() + "|" + last_turn
+        return hashlib.sha256(normalized.encode()).hexdigest()[:32]
+
+    async def aget(self, user_input: str, last_turn: str = "") -> Optional[str]:
+        """Return a cached response for the input, or None on a miss."""
+        key = self.make_key(user_input, last_turn)
+        now = time.monotonic()
+
+        entry = self._exact.get(key)
+        if entry is not None:
+            expires_at, response = entry
+            if expires_at > now:
+                self._exact.move_to_end(key)
+                return response
+            del self._exact[key]
+
+        if self.embeddings is None:
+            return None
+
+        vector = await self._embed(user_input)
+        if len(self._pending) >= self.maxsize:
+            self._pending.clear()
+        self._pending[key] = vector
+
+        self._semantic = [item for item in self._semantic if item[0] > now]
+        context = self._semantic_context(user_input, last_turn)
+        candidates = [item for item in self._semantic if item[1] == context]
+        if not candidates:
+            return None
+
+        similarities = np.stack([item[2] for item in candidates]) @ vector
+        best = int(np.argmax(similarities))
+        if similarities[best] >= self.similarity_threshold:
+            return candidates[best][3]
+        return None
+
+    async def aset(self, user_input: str, response: str, last_turn: str = "") -> None:
+        """Store a response for the input in both tiers."""
+        key = self.make_key(user_input, last_turn)
+        expires_at = time.monotonic() + self.ttl
+
+        self._exact[key] = (expires_at, response)
+        self._exact.move_to_end(key)
+        if len(self._exact) > self.maxsize:
+            self._exact.popitem(last=False)
+
+        if self.embeddings is None:
+            return
+
+        vector = self._pending.pop(key, None)
+        if vector is None:
+            vector = await self._embed(user_input)
+        self._semantic.append((expires_at, self._semantic_context(user_input, last_turn), vector, response))
+        if len(self._semantic) > self.maxsize:
+            del self._semantic[0]
+
+    def clear(self) -> None:
+        """Drop every cached response."""
+        self._exact.clear()
+        self._semantic.clear()
+        self._pending.clear()
+
+    def _semantic_context(self, user_input: str, last_turn: str) -> str:
+        """Key that a semantic hit must share: the last turn plus the input's content terms."""
+        return self.make_key(" ".join(sorted(content_terms(user_input))), last_turn)
+
+    async def _embed(self, text: str) -> np.ndarray:
+        vector = np.asarray(await self.embeddings.aembed_query(text.strip()), dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
@@ -0,0 +1,108 @@
+import asyncio
+
+import response_cache
+from response_cache import ResponseCache, content_terms
+
+
+class FakeEmbeddings:
+    """Embeds every text to the same vector, so only the context key decides a hit."""
+
+    def __init__(self):
+        self.calls = 0
+
+    async def aembed_query(self, text):
+        self.calls += 1
+        return [3.0, 4.0]
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_exact_hit_ignores_case_and_surrounding_whitespace():
+    cache = ResponseCache()
+    run(cache.aset("Weather in Paris", "sunny", "hi"))
+    assert run(cache.aget("  weather in paris ", "hi")) == "sunny"
+
+
+def test_entries_expire_after_ttl(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(response_cache.time, "monotonic", clock)
+    cache = ResponseCache(ttl=60, embeddings=FakeEmbeddings())
+    run(cache.aset("Paris weather next week", "sunny"))
+
+    clock.now += 59
+    assert run(cache.aget("Paris weather next week")) == "sunny"
+    assert run(cache.aget("weather in Paris next week")) == "sunny"
+
+    clock.now += 2
+    assert run(cache.aget("Paris weather next week")) is None
+    assert run(cache.aget("weather in Paris next week")) is None
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = ResponseCache(maxsize=2)
+    run(cache.aset("a", "A"))
+    run(cache.aset("b", "B"))
+    assert run(cache.aget("a")) == "A"
+
+    run(cache.aset("c", "C"))
+    assert run(cache.aget("a")) == "A"
+    assert run(cache.aget("b")) is None
+    assert run(cache.aget("c")) == "C"
+
+
+def test_exact_tier_is_scoped_to_last_turn():
+    cache = ResponseCache()
+    run(cache.aset("yes please", "itinerary for Paris", "Want a Paris itinerary?"))
+    assert run(cache.aget("yes please", "Want a Rome itinerary?")) is None
+
+
+def test_semantic_tier_matches_rephrasings_only():
+    cache = ResponseCache(embeddings=FakeEmbeddings())
+    run(cache.aset("Paris weather next week", "sunny", "hi"))
+
+    assert run(cache.aget("What is the weather in paris next week?", "hi")) == "sunny"
+    assert run(cache.aget("Rome weather next week", "hi")) is None
+    assert run(cache.aget("paris weather next week", "other turn")) is None
+
+
+def test_semantic_tier_separates_trips_differing_by_numbers_or_dates():
+    cache = ResponseCache(embeddings=FakeEmbeddings())
+    run(cache.aset("3-day Paris trip in May, $2000", "itinerary A"))
+    assert run(cache.aget("5-day Paris trip in June, $3000")) is None
+    assert run(cache.aget("3-day Paris trip in May, $3000")) is None
+
+
+def test_lookup_embedding_is_reused_when_storing():
+    embeddings = FakeEmbeddings()
+    cache = ResponseCache(embeddings=embeddings)
+
+    assert run(cache.aget("Paris weather next week")) is None
+    run(cache.aset("Paris weather next week", "sunny"))
+    assert embeddings.calls == 1
+    assert not cache._pending
+
+    # Storing without a prior lookup has to embed the input itself
+    run(cache.aset("Rome weather next week", "rainy"))
+    assert embeddings.calls == 2
+
+
+def test_exact_only_cache_never_embeds():
+    cache = ResponseCache()
+    run(cache.aset("Paris weather next week", "sunny"))
+    assert run(cache.aget("weather in Paris next week")) is None
+
+
+def test_content_terms_do_not_depend_on_capitalization():
+    assert content_terms("Paris weather next week") == content_terms("weather in paris next week")
+    assert content_terms("Plan a trip to boston") == {"plan", "trip", "boston"}
+    assert content_terms("hotel with pool") != content_terms("hotel without pool")